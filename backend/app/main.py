@@ -3,165 +3,733 @@ import sys
 import asyncio
 if sys.platform == "win32" and sys.version_info >= (3, 8):
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+elif sys.platform != "win32":
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
 
+import atexit
+import codecs
+import datetime
+import logging
+import logging.handlers
+import queue
+from collections.abc import AsyncIterator, Callable
+import json
+import os
+from pathlib import Path
+from urllib.parse import urlsplit
+import aiofiles
+import aiofiles.os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl
 import httpx 
-import os
-from dotenv import load_dotenv
+from pydantic_settings import BaseSettings, SettingsConfigDict
 import google.generativeai as genai
+from google.generativeai import caching
+from google.api_core import exceptions as google_exceptions
 from fastapi.middleware.cors import CORSMiddleware
-from playwright.async_api import async_playwright
+from brotli_asgi import BrotliMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from cachetools import LRUCache
+from selectolax.parser import HTMLParser
+from playwright.async_api import async_playwright, Route, TimeoutError as PlaywrightTimeoutError
+from app.prompts import PROMPT_EXAMPLE_CLONE, PROMPT_EXAMPLE_HTML
+from app.response_cache import ResponseCache, cache_key, embed_text, normalize_html
+from app.sanitize import CodeFenceStripper, clean_llm_output, shrink_html, truncate_html, visible_text
 
+BACKEND_DIR = Path(__file__).resolve().parent.parent
 
-print(f"--- Main.py Top Level ---")
-print(f"Python version: {sys.version_info}")
-print(f"Platform: {sys.platform}")
-print(f"Initial asyncio event loop policy: {type(asyncio.get_event_loop_policy()).__name__}")
 
+class Settings(BaseSettings):
+    # Anchored to backend/ so the app finds its .env whatever directory uvicorn is started from.
+    model_config = SettingsConfigDict(env_file=BACKEND_DIR / ".env", extra="ignore")
 
-load_dotenv()
-print("Environment variables loaded (or attempted).")
+    google_api_key: str = Field(min_length=1)
+    hostname: str | None = None
+    log_level: str = "INFO"
+    max_html_length: int = 70000
+    response_cache_dir: str = str(BACKEND_DIR / ".cache" / "responses")
+    enable_semantic_cache: bool = False
+    max_inflight_clones: int = 8
+    max_inflight_gemini_calls: int = 4
+    artifact_dir: str | None = None
 
-GEMINI_API_KEY = os.getenv("GOOGLE_API_KEY")
+# Validated once at import: a missing GOOGLE_API_KEY stops the worker from starting at all.
+settings = Settings()
 
+# Handlers run on the listener's thread, so a slow stdout never blocks the event loop.
+log_queue: queue.Queue = queue.Queue(-1)
+log_stream_handler = logging.StreamHandler()
+log_stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+log_listener = logging.handlers.QueueListener(log_queue, log_stream_handler, respect_handler_level=True)
+root_logger = logging.getLogger()
+root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+root_logger.setLevel(settings.log_level.upper())
+log_listener.start()
+atexit.register(log_listener.stop)
+logger = logging.getLogger(__name__)
 
-if not GEMINI_API_KEY:
-    print("🔴 WARNING: GOOGLE_API_KEY not found. LLM calls will fail.")
-else:
-    try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        print("🟢 Gemini API Key configured successfully.")
-    except Exception as e:
-        print(f"🔴 ERROR: Failed to configure Gemini API: {e}")
+logger.debug("--- Main.py Top Level ---")
+logger.debug("Python version: %s", sys.version_info)
+logger.debug("Platform: %s", sys.platform)
+logger.debug("Initial asyncio event loop policy: %s", type(asyncio.get_event_loop_policy()).__name__)
+
+try:
+    genai.configure(api_key=settings.google_api_key)
+    logger.info("🟢 Gemini API Key configured successfully.")
+except Exception as e:
+    logger.error("🔴 Failed to configure Gemini API: %s", e)
 
 class CloneUrlRequest(BaseModel):
     target_url: HttpUrl
 
+MAX_BATCH_URLS = 20
+
+class BatchCloneRequest(BaseModel):
+    urls: list[HttpUrl] = Field(min_length=1, max_length=MAX_BATCH_URLS)
+
+# Stable (non "-latest") name, so the same model serves both the explicit-cache and inline paths.
+GEMINI_MODEL_NAME = 'gemini-2.5-flash'
+# Explicit caching on gemini-2.5-flash needs at least this many input tokens (1.5 models need 32,768).
+PROMPT_CACHE_MIN_TOKENS = 1024
+PROMPT_CACHE_TTL = datetime.timedelta(hours=1)
+PROMPT_CACHE_REFRESH_MARGIN = datetime.timedelta(minutes=10)
+MAX_HTML_LENGTH = settings.max_html_length
+# gemini-2.5-flash counts thinking tokens against this limit, so leave room beyond the ~8K a page needs.
+MAX_OUTPUT_TOKENS = 16384
+# With a computed-style summary the HTML only needs to convey structure, so far less of it is sent.
+MAX_HTML_LENGTH_WITH_SUMMARY = 15000
+# Scraped HTML is shrunk before the MAX_HTML_LENGTH cut, so read a few times more than that. This is
+# a size cap, not an exact unit: httpx counts bytes, the Playwright .slice() counts UTF-16 code units.
+MAX_RAW_HTML_SIZE = MAX_HTML_LENGTH * 4
+
+PROMPT_INSTRUCTIONS = """
+You are an AI web designer tasked with creating an aesthetic HTML clone of a given website.
+Your goal is to replicate the visual appearance, layout, **original color scheme (including background and text colors)**, and typography using a *single, self-contained HTML file*.
+**Key Instructions for Color:**
+* Pay close attention to the **original background color** of the page (e.g., white, light gray, black, etc.).
+* Pay close attention to the **primary text color** used on that background.
+* Replicate this **exact background-text color pairing**. For instance, if the original is black text on a white background, your clone must also have black text on a white background.
+* Preserve the color of hyperlinks if discernible.
+**General Instructions:**
+1.  Analyze the provided HTML structure and content for its aesthetic qualities.
+2.  Generate a *new* HTML structure. Do NOT simply copy the input HTML.
+3.  Use inline CSS or a single `<style>` block within the `<head>` for all styling. Do not use external CSS files.
+4.  Do NOT include any JavaScript or `<script>` tags.
+5.  Focus on visual fidelity to the original, especially the color palette.
+6.  The output must be ONLY the complete HTML code, starting with `<!DOCTYPE html>` or `<html>` and ending with `</html>`.
+7.  Do not include any explanations, comments, or markdown formatting (like ```html) outside of the HTML code itself.
+"""
+
+def build_request_prompt(site_url: str, truncated_html: str, style_summary: str | None = None) -> str:
+    summary_section = f"""
+**Computed Style Summary (JSON from the rendered page; authoritative for colors and fonts):**
+```json
+{style_summary}
+```""" if style_summary else ""
+    return f"""
+**Original Website URL (for context only):** {site_url}{summary_section}
+**Original Website HTML (for aesthetic reference - may be truncated):**
+```html
+{truncated_html}
+```
+Now, generate the new, self-contained HTML code that aesthetically clones the site, ensuring the background and text colors match the original:
+"""
+
+# Fixed worked example sent ahead of every request. Besides showing the expected output shape,
+# it brings the cached block to ~9.5K chars (~2.4K tokens), over PROMPT_CACHE_MIN_TOKENS.
+PROMPT_FEW_SHOT = [
+    {"role": "user", "parts": [build_request_prompt("https://harborstreetbakery.example", PROMPT_EXAMPLE_HTML)]},
+    {"role": "model", "parts": [PROMPT_EXAMPLE_CLONE]},
+]
+
+response_cache = ResponseCache(
+    directory=settings.response_cache_dir,
+    semantic=settings.enable_semantic_cache,
+)
+
+# Built once: the fixed instructions always sit at the start of the request, which also lets
+# Gemini's implicit prefix caching match them when no explicit cache is available.
+GEMINI_MODEL = genai.GenerativeModel(GEMINI_MODEL_NAME, system_instruction=PROMPT_INSTRUCTIONS)
+
+# ~4 chars per token underestimates HTML-heavy text, so this errs on the side of not caching.
+PROMPT_CACHE_ESTIMATED_TOKENS = (len(PROMPT_INSTRUCTIONS) + sum(len(part) for content in PROMPT_FEW_SHOT for part in content["parts"])) // 4
+
+prompt_cache: caching.CachedContent | None = None
+prompt_cache_model: genai.GenerativeModel | None = None
+prompt_cache_lock = asyncio.Lock()
+# Set when the API rejects the cache request outright (too few tokens, unsupported model), so
+# startup, refresh and NotFound handling stop retrying a request that can never succeed.
+prompt_cache_disabled = False
+
+async def create_prompt_cache() -> caching.CachedContent | None:
+    global prompt_cache, prompt_cache_model, prompt_cache_disabled
+    if prompt_cache_disabled: return None
+    if PROMPT_CACHE_ESTIMATED_TOKENS < PROMPT_CACHE_MIN_TOKENS:
+        prompt_cache_disabled = True
+        logger.warning("🔴 Prompt preamble (~%s tokens) is below Gemini's %s-token caching minimum; using the inline prompt.", PROMPT_CACHE_ESTIMATED_TOKENS, PROMPT_CACHE_MIN_TOKENS)
+        return None
+    try:
+        prompt_cache = await asyncio.to_thread(
+            caching.CachedContent.create,
+            model=f"models/{GEMINI_MODEL_NAME}",
+            display_name="orchids-cloner-preamble",
+            system_instruction=PROMPT_INSTRUCTIONS,
+            contents=PROMPT_FEW_SHOT,
+            ttl=PROMPT_CACHE_TTL,
+        )
+        prompt_cache_model = genai.GenerativeModel.from_cached_content(cached_content=prompt_cache)
+        logger.info("🟢 Gemini prompt cache created: %s", prompt_cache.name)
+    except google_exceptions.InvalidArgument as e:
+        prompt_cache = None
+        prompt_cache_model = None
+        prompt_cache_disabled = True
+        logger.warning("🔴 Gemini rejected the prompt cache; using the inline prompt for this process: %s", e)
+    except Exception as e:
+        prompt_cache = None
+        prompt_cache_model = None
+        logger.warning("🔴 Failed to create Gemini prompt cache, using inline prompt instead: %s", e)
+    return prompt_cache
+
+async def rebuild_prompt_cache(stale_name: str) -> caching.CachedContent | None:
+    async with prompt_cache_lock:
+        # Another request may already have replaced the stale handle.
+        if prompt_cache is None or prompt_cache.name == stale_name: await create_prompt_cache()
+        return prompt_cache
+
+async def refresh_prompt_cache_forever():
+    while not prompt_cache_disabled:
+        await asyncio.sleep((PROMPT_CACHE_TTL - PROMPT_CACHE_REFRESH_MARGIN).total_seconds())
+        async with prompt_cache_lock:
+            if prompt_cache is None:
+                await create_prompt_cache()
+                continue
+            try:
+                await asyncio.to_thread(prompt_cache.update, ttl=PROMPT_CACHE_TTL)
+                logger.info("Gemini prompt cache TTL extended: %s", prompt_cache.name)
+            except google_exceptions.NotFound:
+                logger.warning("🔴 Gemini prompt cache expired before refresh; rebuilding.")
+                await create_prompt_cache()
+            except Exception as e:
+                logger.warning("🔴 Failed to refresh Gemini prompt cache: %s", e)
+
+MAX_BROWSER_CONTEXTS = 8
+# Each in-flight clone can hold a Chromium context (~100 MB) plus a large prompt, so cap them.
+MAX_INFLIGHT_CLONES = settings.max_inflight_clones
+# Sized to the Gemini API quota rather than to host resources.
+MAX_INFLIGHT_GEMINI_CALLS = settings.max_inflight_gemini_calls
+CLONE_QUEUE_TIMEOUT_SECONDS = 2.0
+CLONE_RETRY_AFTER_SECONDS = 10
+# Batch items queue for a slot, but only for so long, and all batches together never hold more than
+# half the slots (one semaphore shared across requests) so single /clone_website callers are not starved.
+BATCH_SLOT_TIMEOUT_SECONDS = 60.0
+BATCH_CONCURRENCY = max(1, MAX_INFLIGHT_CLONES // 2)
+MAX_QUEUED_BATCH_URLS = 40
+BROWSER_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+)
+DEFAULT_HEADERS = {
+    "User-Agent": BROWSER_USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+async def warm_up_browser(browser):
+    # The first context/page pays for renderer process startup; do it before serving traffic.
+    try:
+        context = await browser.new_context()
+        page = await context.new_page()
+        await page.goto("about:blank")
+        await context.close()
+        logger.info("🟢 Playwright browser warmed up.")
+    except Exception as e:
+        logger.warning("🔴 Playwright browser warmup failed: %s", e)
+
+async def launch_browser(playwright):
+    return await playwright.chromium.launch(headless=True, args=["--disable-dev-shm-usage", "--no-sandbox"])
+
+async def get_browser():
+    # A crashed or disconnected Chromium would otherwise fail every scrape until the process restarts.
+    if app.state.browser.is_connected(): return app.state.browser
+    async with app.state.browser_lock:
+        if not app.state.browser.is_connected():
+            logger.warning("🔴 Shared Playwright browser disconnected; relaunching.")
+            app.state.browser = await launch_browser(app.state.playwright)
+            logger.info("🟢 Shared Playwright browser relaunched.")
+    return app.state.browser
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.playwright = await async_playwright().start()
+    app.state.browser = await launch_browser(app.state.playwright)
+    app.state.browser_lock = asyncio.Lock()
+    app.state.ctx_sem = asyncio.Semaphore(MAX_BROWSER_CONTEXTS)
+    app.state.clone_sem = asyncio.Semaphore(MAX_INFLIGHT_CLONES)
+    app.state.gemini_sem = asyncio.Semaphore(MAX_INFLIGHT_GEMINI_CALLS)
+    app.state.batch_sem = asyncio.Semaphore(BATCH_CONCURRENCY)
+    app.state.queued_batch_urls = 0
+    logger.info("🟢 Shared Playwright browser launched.")
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        follow_redirects=True,
+        timeout=httpx.Timeout(20.0, connect=5.0),
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+        headers=DEFAULT_HEADERS,
+    )
+    await create_prompt_cache()
+    await asyncio.gather(warm_up_browser(app.state.browser), prewarm_gemini_model())
+    refresh_task = asyncio.create_task(refresh_prompt_cache_forever())
+    try:
+        yield
+    finally:
+        refresh_task.cancel()
+        await asyncio.gather(*artifact_tasks, return_exceptions=True)
+        response_cache.close()
+        await app.state.http.aclose()
+        await app.state.browser.close()
+        await app.state.playwright.stop()
+        logger.info("Shared Playwright browser closed.")
+        if prompt_cache is not None:
+            try:
+                await asyncio.to_thread(prompt_cache.delete)
+                logger.info("Gemini prompt cache deleted.")
+            except Exception as e:
+                logger.warning("🔴 Failed to delete Gemini prompt cache: %s", e)
+
 app = FastAPI(
     title="Orchids Website Cloner API",
-    description="API for fetching website content using local Playwright and aesthetic cloning using Google Gemini.",
+    description="API for fetching website content using httpx (escalating to local Playwright for JavaScript-rendered pages) and aesthetic cloning using Google Gemini.",
     version="0.6.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 origins = [
-    "http://localhost:3000", "http://127.0.0.1:3000",
-    f"http://{os.getenv('HOSTNAME')}:3000", "http://192.168.0.237:3000",
+    "http://localhost:3000", "http://127.0.0.1:3000", "http://192.168.0.237:3000",
 ]
+if settings.hostname: origins.append(f"http://{settings.hostname}:3000")
 app.add_middleware(CORSMiddleware, allow_origins=origins, allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+# Brotli for clients that accept it, gzip otherwise; small responses like "/" are left uncompressed.
+# The stream endpoint is excluded: Starlette's gzip fallback buffers instead of flushing per chunk,
+# which would hold back the first bytes of the clone.
+app.add_middleware(BrotliMiddleware, quality=4, minimum_size=1024, gzip_fallback=True, excluded_handlers=[r"^/clone_website/stream$"])
 
-async def scrape_with_local_playwright(target_url: str) -> str:
-    print(f"Attempting to scrape {target_url} using local Playwright.")
+# Stylesheets are deliberately still loaded: the clone depends on the page's real colors and fonts.
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+TRACKER_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "facebook.net",
+    "connect.facebook.com", "hotjar.com", "segment.io", "segment.com", "mixpanel.com",
+    "clarity.ms", "adservice.google.com", "fullstory.com", "newrelic.com", "nr-data.net",
+)
+
+def is_tracker_url(url: str) -> bool:
+    host = urlsplit(url).hostname or ""
+    return any(host == domain or host.endswith("." + domain) for domain in TRACKER_DOMAINS)
+
+async def block_heavy_resources(route: Route):
+    request = route.request
+    # Never abort the page itself: the site being cloned may well live on one of these domains.
+    if request.is_navigation_request():
+        await route.continue_()
+    elif request.resource_type in BLOCKED_RESOURCE_TYPES or is_tracker_url(request.url):
+        await route.abort()
+    else:
+        await route.continue_()
+
+# Computed colors/fonts for the page root, the 50 largest visible elements, links and a heading/section outline.
+JS_SUMMARY_SRC = """
+() => {
+  const pick = (el) => {
+    const s = getComputedStyle(el);
+    return { tag: el.tagName.toLowerCase(), backgroundColor: s.backgroundColor, color: s.color, fontFamily: s.fontFamily, fontSize: s.fontSize };
+  };
+  const body = document.body;
+  const elements = body ? Array.from(body.querySelectorAll("*")).slice(0, 3000) : [];
+  const largest = elements
+    .map((el) => { const r = el.getBoundingClientRect(); return [r.width * r.height, el]; })
+    .filter(([area]) => area > 0)
+    .sort((a, b) => b[0] - a[0])
+    .slice(0, 50)
+    .map(([area, el]) => ({ ...pick(el), area: Math.round(area) }));
+  const linkColors = [...new Set(Array.from(document.querySelectorAll("a[href]")).slice(0, 20).map((a) => getComputedStyle(a).color))];
+  const outline = Array.from(document.querySelectorAll("header, nav, main, section, article, aside, footer, h1, h2, h3"))
+    .slice(0, 80)
+    .map((el) => ({ tag: el.tagName.toLowerCase(), text: (el.innerText || "").trim().replace(/\\s+/g, " ").slice(0, 80) }));
+  return { title: document.title, root: pick(document.documentElement), body: body ? pick(body) : null, largest, linkColors, outline };
+}
+"""
+
+async def scrape_with_local_playwright(target_url: str) -> tuple[str, str | None]:
+    logger.info("Attempting to scrape %s using local Playwright.", target_url)
     html_content = ""
-    pw_instance = None
-    browser = None
+    async with app.state.ctx_sem:
+        context = None
+        try:
+            browser = await get_browser()
+            context = await browser.new_context(user_agent=BROWSER_USER_AGENT, java_script_enabled=True)
+            page = await context.new_page()
+            await page.route("**/*", block_heavy_resources)
+
+            logger.debug("Navigating to %s with local Playwright...", target_url)
+            await page.goto(target_url, wait_until="domcontentloaded", timeout=15000) # 15 seconds
+            try:
+                # Give client-rendered pages a brief chance to settle without waiting on slow beacons.
+                await page.wait_for_load_state("networkidle", timeout=3000)
+            except PlaywrightTimeoutError:
+                pass
+
+            page_title = await page.title()
+            logger.debug("Page title from local Playwright: '%s'", page_title)
+
+            html_content = await page.evaluate(f"() => document.documentElement.outerHTML.slice(0, {MAX_RAW_HTML_SIZE})")
+
+            if not html_content:
+                logger.warning("🔴 Local Playwright returned empty HTML content.")
+                raise HTTPException(status_code=500, detail="Local Playwright returned empty HTML content.")
+
+            style_summary = None
+            try:
+                style_summary = json.dumps(await page.evaluate(JS_SUMMARY_SRC), separators=(",", ":"))
+                logger.debug("Extracted computed style summary. Length: %s", len(style_summary))
+            except Exception as e:
+                logger.warning("🔴 Style summary extraction failed, sending raw HTML only: %s", e)
+
+            logger.info("✅ Successfully scraped with local Playwright. HTML length: %s", len(html_content))
+            return html_content, style_summary
+
+        except Exception as e:
+            error_type = type(e).__name__
+            logger.error("🔴 Error during local Playwright operation: %s - %s", error_type, e, exc_info=logger.isEnabledFor(logging.DEBUG))
+            raise HTTPException(status_code=500, detail=f"Error during local Playwright scraping: {error_type} - {str(e)}")
+
+        finally:
+            if context:
+                await context.close()
+                logger.debug("Playwright browser context closed.")
+
+
+async def fetch_with_httpx(target_url: str) -> str:
+    logger.debug("Fetching %s with the shared httpx client.", target_url)
+    try:
+        async with app.state.http.stream("GET", target_url) as response:
+            response.raise_for_status()
+            chunks = []
+            total = 0
+            async for chunk in response.aiter_bytes(65536):
+                chunks.append(chunk)
+                total += len(chunk)
+                if total >= MAX_RAW_HTML_SIZE: break
+            encoding = response.charset_encoding or "utf-8"
+            http_version = response.http_version
+    except httpx.HTTPError as e:
+        logger.error("🔴 Error fetching %s with httpx: %s - %s", target_url, type(e).__name__, e)
+        raise HTTPException(status_code=502, detail=f"Error fetching URL: {type(e).__name__} - {str(e)}")
     try:
-        pw_instance = await async_playwright().start()
+        codecs.lookup(encoding)
+    except LookupError:
+        # The charset comes straight from the Content-Type header and may name no codec Python knows.
+        logger.warning("🔴 Unknown charset %r for %s; decoding as utf-8.", encoding, target_url)
+        encoding = "utf-8"
+    html_content = b"".join(chunks)[:MAX_RAW_HTML_SIZE].decode(encoding, errors="replace")
+    logger.info("✅ Fetched %s with httpx (%s). HTML length: %s", target_url, http_version, len(html_content))
+    return html_content
 
-        browser = await pw_instance.chromium.launch(headless=True) 
-        page = await browser.new_page()
+SCRAPE_TIMEOUT_SECONDS = 30
+# Pages whose visible body text is shorter than this after a plain GET are treated as client-rendered.
+MIN_STATIC_TEXT_LENGTH = 200
+SPA_ROOT_SELECTORS = ("#root", "#__next", "#app", "#__nuxt")
+host_render_modes: LRUCache = LRUCache(maxsize=1024)
 
-        print(f"Navigating to {target_url} with local Playwright...")
-        await page.goto(target_url, wait_until="networkidle", timeout=60000) # 60 seconds
+def needs_javascript(html: str) -> bool:
+    if len(visible_text(html)) < MIN_STATIC_TEXT_LENGTH: return True
+    tree = HTMLParser(html)
+    for selector in SPA_ROOT_SELECTORS:
+        node = tree.css_first(selector)
+        if node is not None and not visible_text(node.html or ""): return True
+    return False
 
-        page_title = await page.title()
-        print(f"Page title from local Playwright: '{page_title}'")
+async def scrape_website(target_url: str) -> tuple[str, str | None]:
+    host = httpx.URL(target_url).host
+    try:
+        async with asyncio.timeout(SCRAPE_TIMEOUT_SECONDS):
+            render_mode = host_render_modes.get(host)
+            if render_mode != "js":
+                html_content = ""
+                try:
+                    html_content = await fetch_with_httpx(target_url)
+                except HTTPException as e:
+                    logger.warning("🔴 httpx fetch failed for %s, falling back to Playwright: %s", target_url, e.detail)
+                if html_content and (render_mode == "static" or not needs_javascript(html_content)):
+                    host_render_modes[host] = "static"
+                    return html_content, None
+                if html_content:
+                    logger.info("%s looks client-rendered; escalating to local Playwright.", host)
+                    host_render_modes[host] = "js"
+            return await scrape_with_local_playwright(target_url)
+    except TimeoutError:
+        logger.error("🔴 Scraping %s exceeded %ss.", target_url, SCRAPE_TIMEOUT_SECONDS)
+        raise HTTPException(status_code=504, detail=f"Timed out scraping URL after {SCRAPE_TIMEOUT_SECONDS} seconds.")
 
-        html_content = await page.content()
+gemini_warmed_up = False
 
-        if not html_content:
-            print("🔴 WARNING: Local Playwright returned empty HTML content.")
-            raise HTTPException(status_code=500, detail="Local Playwright returned empty HTML content.")
+def current_gemini_model() -> genai.GenerativeModel:
+    return prompt_cache_model or GEMINI_MODEL
 
-        print(f"✅ Successfully scraped with local Playwright. HTML length: {len(html_content)}")
-        return html_content
+async def prewarm_gemini_model() -> genai.GenerativeModel:
+    global gemini_warmed_up
+    model = current_gemini_model()
+    if not gemini_warmed_up:
+        # The async client is shared process-wide, so one tiny call is enough to open the channel.
+        gemini_warmed_up = True
+        try:
+            await GEMINI_MODEL.generate_content_async(
+                "ping", generation_config=genai.types.GenerationConfig(max_output_tokens=1)
+            )
+            logger.info("🟢 Gemini connection warmed up.")
+        except Exception as e:
+            logger.warning("🔴 Gemini warmup call failed: %s", e)
+    return model
 
-    except Exception as e:
-        import traceback
-        detailed_error_trace = traceback.format_exc()
-        error_type = type(e).__name__
-        print(f"🔴 ERROR during local Playwright operation: {error_type} - {e}")
-        print(f"🔴 Full Traceback for Playwright error:\n{detailed_error_trace}")
-        raise HTTPException(status_code=500, detail=f"Error during local Playwright scraping: {error_type} - {str(e)}")
+GENERATION_CONFIG = genai.types.GenerationConfig(max_output_tokens=MAX_OUTPUT_TOKENS, temperature=0.5, candidate_count=1)
 
-    finally:
-        if browser:
-            await browser.close()
-            print("Playwright browser closed.")
-        if pw_instance:
-            await pw_instance.stop() 
-            print("Playwright instance stopped.")
-
-
-async def generate_html_with_gemini(original_html: str, site_url: str) -> str:
-    if not GEMINI_API_KEY: raise HTTPException(status_code=500, detail="LLM API key not configured or missing.")
-    print(f"Attempting to generate HTML clone for {site_url} using Gemini.")
-    model_name = 'gemini-1.5-flash-latest'; model = genai.GenerativeModel(model_name)
-    max_html_length = 70000
-    truncated_html = original_html[:max_html_length] + "\n...[TRUNCATED]..." if len(original_html) > max_html_length else original_html
-    prompt = f"""
-    You are an AI web designer tasked with creating an aesthetic HTML clone of a given website.
-    Your goal is to replicate the visual appearance, layout, **original color scheme (including background and text colors)**, and typography using a *single, self-contained HTML file*.
-    **Key Instructions for Color:**
-    * Pay close attention to the **original background color** of the page (e.g., white, light gray, black, etc.).
-    * Pay close attention to the **primary text color** used on that background.
-    * Replicate this **exact background-text color pairing**. For instance, if the original is black text on a white background, your clone must also have black text on a white background.
-    * Preserve the color of hyperlinks if discernible.
-    **General Instructions:**
-    1.  Analyze the provided HTML structure and content for its aesthetic qualities.
-    2.  Generate a *new* HTML structure. Do NOT simply copy the input HTML.
-    3.  Use inline CSS or a single `<style>` block within the `<head>` for all styling. Do not use external CSS files.
-    4.  Do NOT include any JavaScript or `<script>` tags.
-    5.  Focus on visual fidelity to the original, especially the color palette.
-    6.  The output must be ONLY the complete HTML code, starting with `<!DOCTYPE html>` or `<html>` and ending with `</html>`.
-    7.  Do not include any explanations, comments, or markdown formatting (like ```html) outside of the HTML code itself.
-    **Original Website URL (for context only):** {site_url}
-    **Original Website HTML (for aesthetic reference - may be truncated):**
-    ```html
-    {truncated_html}
-    ```
-    Now, generate the new, self-contained HTML code that aesthetically clones the site, ensuring the background and text colors match the original:
-    """
-    print(f"Sending prompt to Gemini (model: {model_name}).")
-    response = await model.generate_content_async(prompt)
-    generated_html = response.text.strip()
-    if generated_html.startswith("```html"): generated_html = generated_html[len("```html"):].strip()
-    if generated_html.startswith("```"): generated_html = generated_html[len("```"):].strip()
-    if generated_html.endswith("```"): generated_html = generated_html[:-len("```")].strip()
-    if not generated_html: print("🔴 WARNING: LLM returned an empty response after cleanup.")
-    print(f"Cleaned LLM HTML length: {len(generated_html)} chars.")
+def prepare_request_prompt(original_html: str, site_url: str, style_summary: str | None) -> str:
+    logger.info("Attempting to generate HTML clone for %s using Gemini.", site_url)
+    original_length = len(original_html)
+    original_html = shrink_html(original_html)
+    logger.debug("Shrunk HTML from %s to %s chars.", original_length, len(original_html))
+    max_html_length = MAX_HTML_LENGTH_WITH_SUMMARY if style_summary else MAX_HTML_LENGTH
+    truncated_html = truncate_html(original_html, max_html_length)
+    return build_request_prompt(site_url, truncated_html, style_summary)
+
+def build_contents(model: genai.GenerativeModel, request_prompt: str) -> str | list[dict]:
+    # The few-shot example lives in the cached content; without a cache send it inline so both paths see the same prompt.
+    if model.cached_content is not None: return request_prompt
+    return PROMPT_FEW_SHOT + [{"role": "user", "parts": [request_prompt]}]
+
+async def start_generation(model: genai.GenerativeModel, request_prompt: str, stream: bool = False):
+    logger.debug("Sending prompt to Gemini (model: %s, cached content: %s, stream: %s).", model.model_name, model.cached_content, stream)
+    try:
+        return await model.generate_content_async(build_contents(model, request_prompt), generation_config=GENERATION_CONFIG, stream=stream)
+    except google_exceptions.NotFound:
+        if model.cached_content is None: raise
+        logger.warning("🔴 Gemini prompt cache not found; rebuilding it.")
+        await rebuild_prompt_cache(model.cached_content)
+        model = current_gemini_model()
+        return await model.generate_content_async(build_contents(model, request_prompt), generation_config=GENERATION_CONFIG, stream=stream)
+
+async def generate_html_with_gemini(model: genai.GenerativeModel, original_html: str, site_url: str, style_summary: str | None = None) -> str:
+    request_prompt = prepare_request_prompt(original_html, site_url, style_summary)
+    async with app.state.gemini_sem:
+        response = await start_generation(model, request_prompt)
+    generated_html = clean_llm_output(response.text)
+    if not generated_html: logger.warning("🔴 LLM returned an empty response after cleanup.")
+    logger.debug("Cleaned LLM HTML length: %s chars.", len(generated_html))
     return generated_html
 
-@app.post("/clone_website", tags=["Cloning"])
-async def process_url_for_cloning(request_data: CloneUrlRequest):
-    url_to_clone = str(request_data.target_url)
-    print(f"🚀 Received request to clone URL (using local Playwright): {url_to_clone}")
+async def stream_html_with_gemini(model: genai.GenerativeModel, original_html: str, site_url: str, style_summary: str | None = None) -> AsyncIterator[str]:
+    request_prompt = prepare_request_prompt(original_html, site_url, style_summary)
+    stripper = CodeFenceStripper()
+    async with app.state.gemini_sem:
+        response = await start_generation(model, request_prompt, stream=True)
+        async for chunk in response:
+            if not chunk.parts: continue
+            text = stripper.feed(chunk.text)
+            if text: yield text
+    text = stripper.finish()
+    if text: yield text
+
+async def save_artifact(path: str, data: bytes) -> None:
+    # File writes go through aiofiles' thread pool so they never block the event loop.
+    directory = os.path.dirname(path)
+    if directory: await aiofiles.os.makedirs(directory, exist_ok=True)
+    async with aiofiles.open(path, "wb") as f:
+        await f.write(data)
+
+async def save_clone_artifacts(site_url: str, original_html: str, generated_html: str) -> None:
+    if not settings.artifact_dir: return
+    stem = os.path.join(settings.artifact_dir, f"{datetime.datetime.now():%Y%m%dT%H%M%S%f}-{httpx.URL(site_url).host}")
+    try:
+        await asyncio.gather(
+            save_artifact(f"{stem}.scraped.html", original_html.encode("utf-8")),
+            save_artifact(f"{stem}.clone.html", generated_html.encode("utf-8")),
+        )
+        logger.debug("Saved clone artifacts to %s.*", stem)
+    except OSError as e:
+        logger.warning("🔴 Failed to save clone artifacts for %s: %s", site_url, e)
+
+# The event loop only keeps weak references to tasks, so hold pending artifact writes here.
+artifact_tasks: set[asyncio.Task] = set()
+
+def schedule_clone_artifacts(site_url: str, original_html: str, generated_html: str) -> None:
+    # Artifacts are a debugging aid; write them off the response path.
+    if not settings.artifact_dir: return
+    task = asyncio.create_task(save_clone_artifacts(site_url, original_html, generated_html))
+    artifact_tasks.add(task)
+    task.add_done_callback(artifact_tasks.discard)
+
+async def lookup_cached_html(original_html: str, site_url: str):
+    normalized_html = normalize_html(original_html)
+    key = cache_key(normalized_html, site_url)
+    cached_html = await response_cache.get(key)
+    if cached_html is not None:
+        logger.info("✅ Response cache hit for %s.", site_url)
+        return key, None, cached_html
+
+    embedding = None
+    page_text = visible_text(original_html) if response_cache.semantic is not None else ""
+    # Pages with no visible text (e.g. unrendered SPA shells) would all look alike, so skip them.
+    if page_text:
+        try:
+            embedding = await embed_text(page_text)
+            cached_html = await response_cache.get_similar(embedding)
+        except Exception as e:
+            logger.warning("🔴 Semantic cache lookup failed for %s: %s", site_url, e)
+        if cached_html is not None:
+            logger.info("✅ Semantic response cache hit for %s.", site_url)
+    return key, embedding, cached_html
 
+async def generate_html_cached(model: genai.GenerativeModel, original_html: str, site_url: str, style_summary: str | None = None) -> str:
+    key, embedding, cached_html = await lookup_cached_html(original_html, site_url)
+    if cached_html is not None: return cached_html
+    generated_html = await generate_html_with_gemini(model, original_html, site_url, style_summary)
+    if generated_html:
+        await response_cache.put(key, generated_html, embedding)
+        schedule_clone_artifacts(site_url, original_html, generated_html)
+    return generated_html
+
+async def stream_html_cached(model: genai.GenerativeModel, original_html: str, site_url: str, style_summary: str | None = None) -> AsyncIterator[str]:
+    key, embedding, cached_html = await lookup_cached_html(original_html, site_url)
+    if cached_html is not None:
+        yield cached_html
+        return
+    chunks = []
+    async for text in stream_html_with_gemini(model, original_html, site_url, style_summary):
+        chunks.append(text)
+        yield text
+    generated_html = clean_llm_output("".join(chunks))
+    logger.info("✅ Streamed LLM HTML for %s. Length: %s chars.", site_url, len(generated_html))
+    if generated_html:
+        await response_cache.put(key, generated_html, embedding)
+        schedule_clone_artifacts(site_url, original_html, generated_html)
+
+async def scrape_for_cloning(url_to_clone: str) -> tuple[str, str | None, genai.GenerativeModel]:
     original_html = ""
+    style_summary = None
     try:
-        original_html = await scrape_with_local_playwright(url_to_clone)
+        (original_html, style_summary), model = await asyncio.gather(
+            scrape_website(url_to_clone), prewarm_gemini_model()
+        )
     except HTTPException:
         raise
     except Exception as e:
-        print(f"🔴 Unexpected error during local Playwright scraping dispatch for {url_to_clone}: {e}")
-        raise HTTPException(status_code=500, detail=f"Unexpected error preparing to scrape URL with local Playwright: {str(e)}")
+        logger.error("🔴 Unexpected error during scraping dispatch for %s: %s", url_to_clone, e)
+        raise HTTPException(status_code=500, detail=f"Unexpected error preparing to scrape URL: {str(e)}")
 
     if not original_html: 
-        raise HTTPException(status_code=500, detail="Scraping via local Playwright yielded no content.")
+        raise HTTPException(status_code=500, detail="Scraping yielded no content.")
+    return original_html, style_summary, model
 
+async def acquire_clone_slot(timeout: float | None = CLONE_QUEUE_TIMEOUT_SECONDS) -> Callable[[], None]:
+    # Fail fast with 503 instead of queueing unboundedly behind a burst.
     try:
-        llm_generated_html = await generate_html_with_gemini(original_html, url_to_clone)
-        print(f"✅ LLM processing complete for {url_to_clone}.")
+        await asyncio.wait_for(app.state.clone_sem.acquire(), timeout=timeout)
+    except TimeoutError:
+        logger.warning("🔴 Rejecting clone request: %s clones already in flight.", MAX_INFLIGHT_CLONES)
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy cloning other websites. Please retry shortly.",
+            headers={"Retry-After": str(CLONE_RETRY_AFTER_SECONDS)},
+        )
+    released = False
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            app.state.clone_sem.release()
+    return release
+
+async def release_when_done(chunks: AsyncIterator[str], release: Callable[[], None]) -> AsyncIterator[str]:
+    try:
+        async for chunk in chunks: yield chunk
+    finally:
+        release()
+
+async def clone_one(url_to_clone: str, slot_timeout: float | None = CLONE_QUEUE_TIMEOUT_SECONDS) -> dict:
+    release_clone_slot = await acquire_clone_slot(slot_timeout)
+    try:
+        original_html, style_summary, model = await scrape_for_cloning(url_to_clone)
+        llm_generated_html = await generate_html_cached(model, original_html, url_to_clone, style_summary)
+        logger.info("✅ LLM processing complete for %s.", url_to_clone)
         return {
             "cloned_html": llm_generated_html,
-            "message": f"Successfully generated aesthetic clone for {url_to_clone} using LLM and local Playwright."
+            "message": f"Successfully generated aesthetic clone for {url_to_clone} using LLM."
         }
     except HTTPException: 
         raise
     except Exception as e: 
-        print(f"🔴 Unexpected error during LLM processing for {url_to_clone}: {e}")
+        logger.error("🔴 Unexpected error during LLM processing for %s: %s", url_to_clone, e)
         raise HTTPException(status_code=500, detail=f"Unexpected server error during LLM processing: {str(e)}")
+    finally:
+        release_clone_slot()
+
+@app.post("/clone_website", tags=["Cloning"])
+async def process_url_for_cloning(request_data: CloneUrlRequest):
+    url_to_clone = str(request_data.target_url)
+    logger.info("🚀 Received request to clone URL: %s", url_to_clone)
+    return await clone_one(url_to_clone)
+
+@app.post("/clone_batch", tags=["Cloning"])
+async def process_urls_for_cloning(request_data: BatchCloneRequest):
+    urls_to_clone = [str(url) for url in request_data.urls]
+    logger.info("🚀 Received request to clone %s URLs.", len(urls_to_clone))
+    if app.state.queued_batch_urls + len(urls_to_clone) > MAX_QUEUED_BATCH_URLS:
+        logger.warning("🔴 Rejecting batch of %s URLs: %s batch URLs already queued.", len(urls_to_clone), app.state.queued_batch_urls)
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy with other batch clones. Please retry shortly.",
+            headers={"Retry-After": str(CLONE_RETRY_AFTER_SECONDS)},
+        )
+    app.state.queued_batch_urls += len(urls_to_clone)
+    async def clone_batch_item(url: str) -> dict:
+        async with app.state.batch_sem:
+            return await clone_one(url, slot_timeout=BATCH_SLOT_TIMEOUT_SECONDS)
+    try:
+        results = await asyncio.gather(*(clone_batch_item(url) for url in urls_to_clone), return_exceptions=True)
+    finally:
+        app.state.queued_batch_urls -= len(urls_to_clone)
+    response_items = []
+    for url, result in zip(urls_to_clone, results):
+        if isinstance(result, HTTPException): response_items.append({"url": url, "error": result.detail})
+        elif isinstance(result, BaseException): response_items.append({"url": url, "error": str(result)})
+        else: response_items.append({"url": url, "cloned_html": result["cloned_html"]})
+    logger.info("✅ Batch clone complete: %s/%s succeeded.", sum("cloned_html" in item for item in response_items), len(response_items))
+    return response_items
+
+@app.post("/clone_website/stream", tags=["Cloning"])
+async def stream_url_for_cloning(request_data: CloneUrlRequest):
+    url_to_clone = str(request_data.target_url)
+    logger.info("🚀 Received request to stream clone of URL: %s", url_to_clone)
+    release_clone_slot = await acquire_clone_slot()
+    try:
+        original_html, style_summary, model = await scrape_for_cloning(url_to_clone)
+    except BaseException:
+        release_clone_slot()
+        raise
+    # Errors after this point surface as a truncated stream, since the 200 status has already been sent.
+    # The slot is released when the stream ends, or by the background task if it never started.
+    return StreamingResponse(
+        release_when_done(stream_html_cached(model, original_html, url_to_clone, style_summary), release_clone_slot),
+        media_type="text/html",
+        background=BackgroundTask(release_clone_slot),
+    )
 
 @app.get("/", tags=["General"])
 async def read_root():
-    return {"message": "Welcome to the Orchids Website Cloner API! Powered by local Playwright and Google Gemini."}
\ No newline at end of file
+    return {"message": "Welcome to the Orchids Website Cloner API! Powered by httpx, local Playwright and Google Gemini."}
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=8000, loop="asyncio" if sys.platform == "win32" else "uvloop", http="httptools")
@@ -0,0 +1,138 @@
+# Fixed worked example for the Gemini prompt: a scraped page and the clone expected for it.
+
+PROMPT_EXAMPLE_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Harbor Street Bakery | Fresh Bread Daily</title>
+<link rel="stylesheet" href="/static/css/main.4f1a9c.css">
+<link rel="preconnect" href="https://fonts.googleapis.com">
+<link href="https://fonts.googleapis.com/css2?family=Playfair+Display:wght@600&family=Lato:wght@400;700&display=swap" rel="stylesheet">
+<script async src="https://www.googletagmanager.com/gtag/js?id=G-XXXX"></script>
+<script>window.dataLayer = window.dataLayer || []; function gtag(){dataLayer.push(arguments);} gtag('js', new Date()); gtag('config', 'G-XXXX');</script>
+<style>
+:root { --cream: #fbf6ee; --brown: #4a2c1a; --rust: #b5542d; --sage: #7d8f69; }
+body { margin: 0; background: var(--cream); color: var(--brown); font-family: 'Lato', sans-serif; }
+a { color: var(--rust); }
+.site-header { display: flex; justify-content: space-between; align-items: center; padding: 18px 48px; border-bottom: 1px solid #e8dcc8; }
+.logo { font-family: 'Playfair Display', serif; font-size: 28px; }
+.nav a { margin-left: 28px; text-decoration: none; font-weight: 700; text-transform: uppercase; font-size: 13px; letter-spacing: 1px; }
+.hero { display: grid; grid-template-columns: 1fr 1fr; gap: 48px; padding: 80px 48px; }
+.hero h1 { font-family: 'Playfair Display', serif; font-size: 56px; line-height: 1.1; margin: 0 0 24px; }
+.btn { display: inline-block; background: var(--rust); color: #fff; padding: 14px 28px; border-radius: 999px; text-decoration: none; }
+.cards { display: grid; grid-template-columns: repeat(3, 1fr); gap: 24px; padding: 0 48px 80px; }
+.card { background: #fff; border-radius: 12px; padding: 24px; box-shadow: 0 2px 8px rgba(74, 44, 26, 0.08); }
+.site-footer { background: var(--brown); color: var(--cream); padding: 40px 48px; font-size: 14px; }
+.site-footer a { color: #f0c9a8; }
+</style>
+</head>
+<body>
+<header class="site-header">
+  <div class="logo">Harbor Street Bakery</div>
+  <nav class="nav" id="main-nav">
+    <a href="/menu">Menu</a>
+    <a href="/wholesale">Wholesale</a>
+    <a href="/about">Our Story</a>
+    <a href="/visit">Visit</a>
+    <a href="/order" class="btn">Order Online</a>
+  </nav>
+</header>
+<main>
+  <section class="hero">
+    <div>
+      <h1>Slow-fermented bread, baked before sunrise.</h1>
+      <p>Every loaf starts with a 36-hour levain, stone-milled flour from local farms, and nothing else we can't pronounce.</p>
+      <a href="/menu" class="btn">See Today's Bake</a>
+    </div>
+    <div class="hero-image"><img src="/img/hero-sourdough.jpg" alt="Fresh sourdough loaves on a wooden rack" width="560" height="420"></div>
+  </section>
+  <section class="cards">
+    <article class="card"><img src="/img/country.jpg" alt=""><h3>Country Sourdough</h3><p>Crackling crust, open crumb, gentle tang.</p><a href="/menu#country">Learn more</a></article>
+    <article class="card"><img src="/img/croissant.jpg" alt=""><h3>Butter Croissants</h3><p>Laminated over three days with cultured butter.</p><a href="/menu#croissant">Learn more</a></article>
+    <article class="card"><img src="/img/rye.jpg" alt=""><h3>Seeded Rye</h3><p>Dense, dark and packed with toasted seeds.</p><a href="/menu#rye">Learn more</a></article>
+  </section>
+  <section class="newsletter">
+    <h2>Fresh from the oven, straight to your inbox</h2>
+    <form action="/subscribe" method="post"><input type="email" name="email" placeholder="you@example.com"><button type="submit" class="btn">Subscribe</button></form>
+  </section>
+</main>
+<footer class="site-footer">
+  <p>Harbor Street Bakery &middot; 112 Harbor Street &middot; Open Tue&ndash;Sun 7am&ndash;3pm</p>
+  <p><a href="/careers">Careers</a> &middot; <a href="/privacy">Privacy</a> &middot; <a href="https://instagram.com/harborstreetbakery">Instagram</a></p>
+</footer>
+<script src="/static/js/vendor.8d2e1b.js"></script>
+<script src="/static/js/app.1c77aa.js"></script>
+</body>
+</html>"""
+
+PROMPT_EXAMPLE_CLONE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Harbor Street Bakery | Fresh Bread Daily</title>
+<style>
+* { box-sizing: border-box; }
+body { margin: 0; background: #fbf6ee; color: #4a2c1a; font-family: Lato, 'Helvetica Neue', Arial, sans-serif; line-height: 1.6; }
+a { color: #b5542d; }
+header { display: flex; justify-content: space-between; align-items: center; padding: 18px 48px; border-bottom: 1px solid #e8dcc8; }
+header .brand { font-family: 'Playfair Display', Georgia, serif; font-size: 28px; font-weight: 600; }
+header nav a { margin-left: 28px; text-decoration: none; font-weight: 700; text-transform: uppercase; font-size: 13px; letter-spacing: 1px; }
+header nav a.pill { background: #b5542d; color: #ffffff; padding: 10px 22px; border-radius: 999px; }
+.hero { display: grid; grid-template-columns: 1fr 1fr; gap: 48px; align-items: center; padding: 80px 48px; }
+.hero h1 { font-family: 'Playfair Display', Georgia, serif; font-size: 56px; line-height: 1.1; margin: 0 0 24px; font-weight: 600; }
+.hero p { font-size: 18px; max-width: 460px; margin: 0 0 32px; }
+.hero .photo { height: 420px; border-radius: 16px; background: linear-gradient(135deg, #d9b38c 0%, #a8703f 55%, #6b3f22 100%); }
+.pill { display: inline-block; background: #b5542d; color: #ffffff; padding: 14px 28px; border-radius: 999px; text-decoration: none; font-weight: 700; }
+.cards { display: grid; grid-template-columns: repeat(3, 1fr); gap: 24px; padding: 0 48px 80px; }
+.card { background: #ffffff; border-radius: 12px; padding: 24px; box-shadow: 0 2px 8px rgba(74, 44, 26, 0.08); }
+.card .thumb { height: 160px; border-radius: 8px; margin-bottom: 16px; }
+.card h3 { font-family: 'Playfair Display', Georgia, serif; font-size: 22px; margin: 0 0 8px; }
+.card p { margin: 0 0 12px; }
+.newsletter { text-align: center; padding: 64px 48px; background: #f3e9da; }
+.newsletter h2 { font-family: 'Playfair Display', Georgia, serif; font-size: 32px; margin: 0 0 24px; }
+.newsletter form { display: inline-flex; gap: 12px; }
+.newsletter input { padding: 14px 20px; border: 1px solid #d8c6ad; border-radius: 999px; font-size: 16px; min-width: 280px; background: #ffffff; color: #4a2c1a; }
+.newsletter button { border: none; cursor: pointer; font-size: 16px; }
+footer { background: #4a2c1a; color: #fbf6ee; padding: 40px 48px; font-size: 14px; }
+footer a { color: #f0c9a8; }
+footer p { margin: 0 0 8px; }
+</style>
+</head>
+<body>
+<header>
+  <div class="brand">Harbor Street Bakery</div>
+  <nav>
+    <a href="#">Menu</a>
+    <a href="#">Wholesale</a>
+    <a href="#">Our Story</a>
+    <a href="#">Visit</a>
+    <a href="#" class="pill">Order Online</a>
+  </nav>
+</header>
+<main>
+  <section class="hero">
+    <div>
+      <h1>Slow-fermented bread, baked before sunrise.</h1>
+      <p>Every loaf starts with a 36-hour levain, stone-milled flour from local farms, and nothing else we can't pronounce.</p>
+      <a href="#" class="pill">See Today's Bake</a>
+    </div>
+    <div class="photo" role="img" aria-label="Fresh sourdough loaves on a wooden rack"></div>
+  </section>
+  <section class="cards">
+    <article class="card"><div class="thumb" style="background: #c89b6d;"></div><h3>Country Sourdough</h3><p>Crackling crust, open crumb, gentle tang.</p><a href="#">Learn more</a></article>
+    <article class="card"><div class="thumb" style="background: #e3b873;"></div><h3>Butter Croissants</h3><p>Laminated over three days with cultured butter.</p><a href="#">Learn more</a></article>
+    <article class="card"><div class="thumb" style="background: #5e4330;"></div><h3>Seeded Rye</h3><p>Dense, dark and packed with toasted seeds.</p><a href="#">Learn more</a></article>
+  </section>
+  <section class="newsletter">
+    <h2>Fresh from the oven, straight to your inbox</h2>
+    <form><input type="email" placeholder="you@example.com"><button type="button" class="pill">Subscribe</button></form>
+  </section>
+</main>
+<footer>
+  <p>Harbor Street Bakery &middot; 112 Harbor Street &middot; Open Tue&ndash;Sun 7am&ndash;3pm</p>
+  <p><a href="#">Careers</a> &middot; <a href="#">Privacy</a> &middot; <a href="#">Instagram</a></p>
+</footer>
+</body>
+</html>"""
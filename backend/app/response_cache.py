@@ -0,0 +1,99 @@
+import asyncio
+import re
+
+import diskcache
+import numpy as np
+import google.generativeai as genai
+from blake3 import blake3
+from cachetools import TTLCache
+
+from app.sanitize import HTML_COMMENT_RE, WHITESPACE_RE
+
+
+EMBEDDING_MODEL_NAME = "models/text-embedding-004"
+EMBEDDING_DIM = 384
+# text-embedding-004 accepts ~2048 tokens of input.
+MAX_EMBEDDING_CHARS = 8000
+
+SCRIPT_RE = re.compile(r"<script\b[^>]*>.*?</script\s*>", re.IGNORECASE | re.DOTALL)
+
+
+def normalize_html(html: str) -> str:
+    html = SCRIPT_RE.sub("", html)
+    html = HTML_COMMENT_RE.sub("", html)
+    return WHITESPACE_RE.sub(" ", html).strip()
+
+
+def cache_key(normalized_html: str, site_url: str) -> str:
+    return blake3((normalized_html + site_url).encode("utf-8")).hexdigest()
+
+
+async def embed_text(page_text: str) -> np.ndarray:
+    # Callers pass the page's visible body text: raw markup starts with <head> boilerplate that is
+    # near-identical across sites built on the same framework/theme and would match them to each other.
+    result = await asyncio.to_thread(
+        genai.embed_content,
+        model=EMBEDDING_MODEL_NAME,
+        content=page_text[:MAX_EMBEDDING_CHARS],
+        task_type="semantic_similarity",
+        output_dimensionality=EMBEDDING_DIM,
+    )
+    return np.asarray(result["embedding"], dtype=np.float32)
+
+
+class SemanticIndex:
+    """Fixed-size ring of unit-normalized embeddings scanned with a single matrix-vector product."""
+
+    def __init__(self, capacity: int, dim: int = EMBEDDING_DIM):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.keys: list[str | None] = [None] * capacity
+        self.size = 0
+        self.cursor = 0
+
+    def add(self, key: str, vector: np.ndarray) -> None:
+        norm = np.linalg.norm(vector)
+        if not norm: return
+        self.vectors[self.cursor] = vector / norm
+        self.keys[self.cursor] = key
+        self.cursor = (self.cursor + 1) % len(self.keys)
+        self.size = min(self.size + 1, len(self.keys))
+
+    def nearest(self, vector: np.ndarray) -> tuple[str | None, float]:
+        norm = np.linalg.norm(vector)
+        if not self.size or not norm: return None, 0.0
+        similarities = self.vectors[:self.size] @ (vector / norm)
+        best = int(np.argmax(similarities))
+        return self.keys[best], float(similarities[best])
+
+
+class ResponseCache:
+    """Exact-match clone cache (memory, then disk) with an optional embedding-similarity tier."""
+
+    def __init__(self, directory: str, maxsize: int = 512, ttl: int = 3600,
+                 semantic: bool = False, similarity_threshold: float = 0.95):
+        self.ttl = ttl
+        self.memory: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.disk = diskcache.Cache(directory)
+        self.semantic = SemanticIndex(maxsize) if semantic else None
+        self.similarity_threshold = similarity_threshold
+
+    async def get(self, key: str) -> str | None:
+        html = self.memory.get(key)
+        if html is None:
+            html = await asyncio.to_thread(self.disk.get, key)
+            if html is not None: self.memory[key] = html
+        return html
+
+    async def get_similar(self, embedding: np.ndarray) -> str | None:
+        if self.semantic is None: return None
+        key, similarity = self.semantic.nearest(embedding)
+        if key is None or similarity < self.similarity_threshold: return None
+        return await self.get(key)
+
+    async def put(self, key: str, html: str, embedding: np.ndarray | None = None) -> None:
+        self.memory[key] = html
+        await asyncio.to_thread(self.disk.set, key, html, expire=self.ttl)
+        if self.semantic is not None and embedding is not None: self.semantic.add(key, embedding)
+
+    def close(self) -> None:
+        self.disk.close()
@@ -0,0 +1,94 @@
+# Compiled with mypyc when built with HATCH_BUILD_HOOKS_ENABLE=1; keep everything fully typed
+# (no Any, no dynamic attributes) so the native build stays a drop-in replacement.
+import re
+from typing import Final
+
+from selectolax.parser import HTMLParser
+
+
+STRIPPED_TAGS: Final[list[str]] = ["script", "noscript", "svg", "iframe"]
+INVISIBLE_TAGS: Final[list[str]] = ["script", "noscript", "style", "template", "svg", "iframe"]
+TRUNCATION_MARKER: Final[str] = "\n...[TRUNCATED]..."
+CODE_FENCE: Final[str] = "```"
+HTML_CODE_FENCE: Final[str] = "```html"
+
+HTML_COMMENT_RE: Final[re.Pattern[str]] = re.compile(r"<!--.*?-->", re.DOTALL)
+BASE64_DATA_URI_RE: Final[re.Pattern[str]] = re.compile(r"data:[\w.+/-]+;base64,[A-Za-z0-9+/=\s]+")
+WHITESPACE_RE: Final[re.Pattern[str]] = re.compile(r"\s+")
+
+
+def shrink_html(html: str) -> str:
+    tree = HTMLParser(HTML_COMMENT_RE.sub("", html))
+    tree.strip_tags(STRIPPED_TAGS)
+    shrunk_html: str = tree.html or ""
+    shrunk_html = BASE64_DATA_URI_RE.sub("data:,", shrunk_html)
+    return WHITESPACE_RE.sub(" ", shrunk_html).strip()
+
+
+def visible_text(html: str) -> str:
+    tree = HTMLParser(html)
+    tree.strip_tags(INVISIBLE_TAGS)
+    body = tree.body
+    if body is None: return ""
+    text: str = body.text(separator=" ", strip=True)
+    return WHITESPACE_RE.sub(" ", text).strip()
+
+
+def truncate_html(text: str, limit: int) -> str:
+    if len(text) <= limit: return text
+    return text[:limit] + TRUNCATION_MARKER
+
+
+def clean_llm_output(text: str) -> str:
+    cleaned = text.strip()
+    if cleaned.startswith(HTML_CODE_FENCE): cleaned = cleaned[len(HTML_CODE_FENCE):].strip()
+    if cleaned.startswith(CODE_FENCE): cleaned = cleaned[len(CODE_FENCE):].strip()
+    if cleaned.endswith(CODE_FENCE): cleaned = cleaned[:-len(CODE_FENCE)].strip()
+    return cleaned
+
+
+class CodeFenceStripper:
+    """Streaming counterpart of clean_llm_output: the concatenated output of feed() and finish()
+    equals clean_llm_output() of the concatenated input, wherever the chunks are split."""
+
+    def __init__(self) -> None:
+        self.started: bool = False
+        self.head: str = ""
+        self.tail: str = ""
+
+    def feed(self, chunk: str) -> str:
+        if not self.started:
+            self.head += chunk
+            body = strip_opening_fence(self.head)
+            # Keep buffering until the opening fence (if any) is settled and real content has started.
+            if body is None: return ""
+            self.started = True
+            self.head = ""
+            chunk = body
+        # Hold back trailing whitespace, the last three characters (a possible closing fence)
+        # and any whitespace in front of them, since clean_llm_output strips all of it.
+        text = self.tail + chunk
+        emit_upto = len(text.rstrip()[:-len(CODE_FENCE)].rstrip())
+        self.tail = text[emit_upto:]
+        return text[:emit_upto]
+
+    def finish(self) -> str:
+        if not self.started:
+            text = clean_llm_output(self.head)
+            self.head = ""
+            return text
+        text = self.tail.rstrip()
+        if text.endswith(CODE_FENCE): text = text[:-len(CODE_FENCE)]
+        self.tail = ""
+        return text.rstrip()
+
+
+def strip_opening_fence(text: str) -> str | None:
+    """Apply clean_llm_output's leading-fence rules; None while more input could change the result."""
+    rest = text.lstrip()
+    if len(rest) < len(HTML_CODE_FENCE) and HTML_CODE_FENCE.startswith(rest): return None
+    if rest.startswith(HTML_CODE_FENCE):
+        rest = rest[len(HTML_CODE_FENCE):].lstrip()
+        if len(rest) < len(CODE_FENCE) and CODE_FENCE.startswith(rest): return None
+    if rest.startswith(CODE_FENCE): rest = rest[len(CODE_FENCE):].lstrip()
+    return rest or None
@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# app.main reads its settings at import time; give it a key and keep its cache out of the repo.
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+os.environ.setdefault("RESPONSE_CACHE_DIR", tempfile.mkdtemp(prefix="response-cache-"))
@@ -0,0 +1,187 @@
+import asyncio
+
+import httpx
+import pytest
+from brotli_asgi import BrotliMiddleware
+
+import app.main as main
+from app.main import app, block_heavy_resources, fetch_with_httpx, host_render_modes, is_tracker_url, needs_javascript
+
+STATIC_TEXT = "Fresh bread baked every morning. " * 10
+
+
+class FakeRequest:
+    def __init__(self, url: str, resource_type: str = "script", navigation: bool = False):
+        self.url = url
+        self.resource_type = resource_type
+        self.navigation = navigation
+
+    def is_navigation_request(self) -> bool:
+        return self.navigation
+
+
+class FakeRoute:
+    def __init__(self, request: FakeRequest):
+        self.request = request
+        self.outcome = None
+
+    async def abort(self):
+        self.outcome = "aborted"
+
+    async def continue_(self):
+        self.outcome = "continued"
+
+
+def route_outcome(request: FakeRequest) -> str:
+    route = FakeRoute(request)
+    asyncio.run(block_heavy_resources(route))
+    return route.outcome
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://www.google-analytics.com/analytics.js", True),
+    ("https://cdn.segment.com/analytics.js", True),
+    ("https://mixpanel.com/track", True),
+    ("https://notmixpanel.com/app.js", False),
+    ("https://example.com/?ref=hotjar.com", False),
+    ("https://example.com/segment.com.js", False),
+])
+def test_is_tracker_url_matches_host_suffix_only(url, expected):
+    assert is_tracker_url(url) is expected
+
+
+def test_block_heavy_resources_never_aborts_navigation():
+    assert route_outcome(FakeRequest("https://segment.com/", "document", navigation=True)) == "continued"
+    assert route_outcome(FakeRequest("https://example.com/?u=docs.newrelic.com", "document", navigation=True)) == "continued"
+
+
+def test_block_heavy_resources_aborts_trackers_and_heavy_types():
+    assert route_outcome(FakeRequest("https://cdn.segment.com/analytics.js")) == "aborted"
+    assert route_outcome(FakeRequest("https://example.com/hero.png", "image")) == "aborted"
+    assert route_outcome(FakeRequest("https://example.com/site.css", "stylesheet")) == "continued"
+
+
+def fetch_with_content_type(body: bytes, content_type: str) -> str:
+    async def fetch():
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body, headers={"Content-Type": content_type}))
+        app.state.http = httpx.AsyncClient(transport=transport)
+        try:
+            return await fetch_with_httpx("https://example.com/")
+        finally:
+            await app.state.http.aclose()
+    return asyncio.run(fetch())
+
+
+def test_fetch_with_httpx_decodes_declared_charset():
+    assert fetch_with_content_type("<p>café</p>".encode("latin-1"), "text/html; charset=iso-8859-1") == "<p>café</p>"
+
+
+def test_fetch_with_httpx_falls_back_to_utf8_for_unknown_charset():
+    assert fetch_with_content_type("<p>café</p>".encode("utf-8"), "text/html; charset=x-unknown") == "<p>café</p>"
+
+
+def test_needs_javascript_accepts_server_rendered_page():
+    assert not needs_javascript(f"<html><body><main><p>{STATIC_TEXT}</p></main></body></html>")
+
+
+@pytest.mark.parametrize("root", ['<div id="root"></div>', '<div id="__next"><script>hydrate()</script></div>'])
+def test_needs_javascript_flags_empty_spa_root(root):
+    assert needs_javascript(f"<html><body><p>{STATIC_TEXT}</p>{root}</body></html>")
+
+
+def test_needs_javascript_flags_short_body_text():
+    assert needs_javascript("<html><head><title>App</title></head><body><p>Loading...</p><script>app()</script></body></html>")
+
+
+@pytest.fixture
+def scrapers(monkeypatch):
+    calls = []
+    async def fake_httpx(url):
+        calls.append("httpx")
+        if fake_httpx.error: raise main.HTTPException(status_code=502, detail="boom")
+        return fake_httpx.html
+    async def fake_playwright(url):
+        calls.append("playwright")
+        return "<html>rendered</html>", "{}"
+    fake_httpx.error = False
+    fake_httpx.html = f"<html><body><p>{STATIC_TEXT}</p></body></html>"
+    monkeypatch.setattr(main, "fetch_with_httpx", fake_httpx)
+    monkeypatch.setattr(main, "scrape_with_local_playwright", fake_playwright)
+    host_render_modes.clear()
+    yield fake_httpx, calls
+    host_render_modes.clear()
+
+
+def test_scrape_website_serves_static_pages_from_httpx(scrapers):
+    fake_httpx, calls = scrapers
+    assert asyncio.run(main.scrape_website("https://static.example/")) == (fake_httpx.html, None)
+    assert calls == ["httpx"]
+    assert host_render_modes["static.example"] == "static"
+
+
+def test_scrape_website_falls_back_to_playwright_on_httpx_error(scrapers):
+    fake_httpx, calls = scrapers
+    fake_httpx.error = True
+    assert asyncio.run(main.scrape_website("https://down.example/")) == ("<html>rendered</html>", "{}")
+    assert calls == ["httpx", "playwright"]
+    assert "down.example" not in host_render_modes
+
+
+def test_scrape_website_escalates_client_rendered_pages(scrapers):
+    fake_httpx, calls = scrapers
+    fake_httpx.html = '<html><body><div id="root"></div></body></html>'
+    asyncio.run(main.scrape_website("https://spa.example/"))
+    assert calls == ["httpx", "playwright"]
+    assert host_render_modes["spa.example"] == "js"
+
+
+def test_scrape_website_skips_httpx_for_hosts_known_to_need_javascript(scrapers):
+    _, calls = scrapers
+    host_render_modes["spa.example"] = "js"
+    assert asyncio.run(main.scrape_website("https://spa.example/page")) == ("<html>rendered</html>", "{}")
+    assert calls == ["playwright"]
+
+
+def compressed_encoding(path: str, accept_encoding: str) -> str | None:
+    # Wrap a plain large response in the app's configured BrotliMiddleware, without running the lifespan.
+    async def inner(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/html")]})
+        await send({"type": "http.response.body", "body": b"<p>clone</p>" * 512})
+    options = next(m.kwargs for m in app.user_middleware if m.cls is BrotliMiddleware)
+    middleware = BrotliMiddleware(inner, **options)
+    started = {}
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        if message["type"] == "http.response.start": started.update(dict(message["headers"]))
+    scope = {"type": "http", "method": "POST", "path": path, "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    asyncio.run(middleware(scope, receive, send))
+    encoding = started.get(b"content-encoding")
+    return encoding.decode() if encoding else None
+
+
+def test_stream_endpoint_is_left_uncompressed():
+    assert compressed_encoding("/clone_website", "gzip") == "gzip"
+    assert compressed_encoding("/clone_website", "br, gzip") == "br"
+    assert compressed_encoding("/clone_website/stream", "gzip") is None
+
+
+def test_concurrent_batches_share_half_the_clone_slots(monkeypatch):
+    running = peak = 0
+    async def fake_clone_one(url, slot_timeout=None):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {"cloned_html": f"<html>{url}</html>"}
+    monkeypatch.setattr(main, "clone_one", fake_clone_one)
+    async def run_batches():
+        app.state.batch_sem = asyncio.Semaphore(main.BATCH_CONCURRENCY)
+        app.state.queued_batch_urls = 0
+        batches = [main.BatchCloneRequest(urls=[f"https://{b}{i}.example/" for i in range(main.BATCH_CONCURRENCY)]) for b in "ab"]
+        return await asyncio.gather(*(main.process_urls_for_cloning(batch) for batch in batches))
+    results = asyncio.run(run_batches())
+    assert all("cloned_html" in item for items in results for item in items)
+    assert peak == main.BATCH_CONCURRENCY
+    assert app.state.queued_batch_urls == 0
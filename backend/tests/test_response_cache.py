@@ -0,0 +1,65 @@
+import asyncio
+
+import numpy as np
+
+from app.response_cache import ResponseCache, SemanticIndex, cache_key, normalize_html
+
+
+def unit(*values: float) -> np.ndarray:
+    return np.asarray(values, dtype=np.float32)
+
+
+def test_normalize_html_drops_scripts_comments_and_whitespace():
+    html = "<html>\n  <!-- build 42 -->\n<script>track()</script>\n  <p>Hi</p>\n</html>"
+    assert normalize_html(html) == "<html> <p>Hi</p> </html>"
+
+
+def test_cache_key_ignores_formatting_but_not_url():
+    a = cache_key(normalize_html("<p>Hi</p>\n\n<script>x()</script>"), "https://a.example")
+    b = cache_key(normalize_html("<p>Hi</p> <script>y()</script>"), "https://a.example")
+    c = cache_key(normalize_html("<p>Hi</p>"), "https://b.example")
+    assert a == b
+    assert a != c
+
+
+def test_semantic_index_returns_most_similar_key():
+    index = SemanticIndex(capacity=4, dim=3)
+    assert index.nearest(unit(1, 0, 0)) == (None, 0.0)
+    index.add("x", unit(2, 0, 0))
+    index.add("y", unit(0, 3, 0))
+    key, similarity = index.nearest(unit(0.1, 1, 0))
+    assert key == "y"
+    assert 0.99 < similarity <= 1.0
+
+
+def test_semantic_index_overwrites_oldest_entry_when_full():
+    index = SemanticIndex(capacity=2, dim=2)
+    index.add("a", unit(1, 0))
+    index.add("b", unit(0, 1))
+    index.add("c", unit(1, 0))
+    assert index.keys == ["c", "b"]
+    assert index.nearest(unit(1, 0))[0] == "c"
+
+
+def test_response_cache_exact_hit_survives_memory_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path), maxsize=1)
+    try:
+        asyncio.run(cache.put("k1", "<html>one</html>"))
+        asyncio.run(cache.put("k2", "<html>two</html>"))
+        assert "k1" not in cache.memory
+        assert asyncio.run(cache.get("k1")) == "<html>one</html>"
+        assert asyncio.run(cache.get("missing")) is None
+    finally:
+        cache.close()
+
+
+def test_response_cache_similarity_threshold(tmp_path):
+    cache = ResponseCache(str(tmp_path), semantic=True, similarity_threshold=0.95)
+    cache.semantic = SemanticIndex(capacity=4, dim=2)
+    try:
+        asyncio.run(cache.put("k", "<html>clone</html>", unit(1, 0)))
+        assert asyncio.run(cache.get_similar(unit(1, 0.1))) == "<html>clone</html>"
+        assert asyncio.run(cache.get_similar(unit(1, 1))) is None
+    finally:
+        cache.close()
+
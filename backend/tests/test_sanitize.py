@@ -0,0 +1,62 @@
+import pytest
+
+from app.sanitize import CodeFenceStripper, clean_llm_output, shrink_html, truncate_html, visible_text
+
+LLM_OUTPUTS = [
+    "```html\n<html>a</html>\n```",
+    "```html\n<html>a</html>\n```\n\n",
+    "  ```\n<!DOCTYPE html><html>```inline``` fence</html>\n ``` ",
+    "<html>no fences</html>",
+    "<html>trailing space</html>   \n",
+    "```html```",
+    "```html````",
+    "```html``x",
+    "``````html",
+    "```ht",
+    "`x",
+    "   ",
+    "",
+    "```html\n\n\n   \n<p>a</p>\n\n   \n```",
+]
+
+
+def stream(chunks: list[str]) -> str:
+    stripper = CodeFenceStripper()
+    return "".join(stripper.feed(chunk) for chunk in chunks) + stripper.finish()
+
+
+@pytest.mark.parametrize("text", LLM_OUTPUTS)
+def test_code_fence_stripper_matches_clean_llm_output_at_every_split(text):
+    expected = clean_llm_output(text)
+    assert stream([text]) == expected
+    assert stream(list(text)) == expected
+    for i in range(len(text) + 1):
+        assert stream([text[:i], text[i:]]) == expected, i
+        for j in range(i, len(text) + 1):
+            assert stream([text[:i], text[i:j], text[j:]]) == expected, (i, j)
+
+
+def test_clean_llm_output_strips_markdown_fences():
+    assert clean_llm_output("```html\n<html></html>\n```") == "<html></html>"
+
+
+def test_truncate_html_marks_truncation():
+    assert truncate_html("abcdef", 10) == "abcdef"
+    assert truncate_html("abcdef", 3) == "abc\n...[TRUNCATED]..."
+
+
+def test_visible_text_ignores_head_and_non_visible_markup():
+    html = (
+        "<html><head><title>T</title><style>body{color:red}</style><link rel=stylesheet href=x.css></head>"
+        "<body><script>app()</script><h1>Fresh  bread</h1>\n<p>Daily</p><template><p>hidden</p></template></body></html>"
+    )
+    assert visible_text(html) == "Fresh bread Daily"
+
+
+def test_shrink_html_strips_heavy_markup_and_collapses_whitespace():
+    html = (
+        "<html><head><script>app()</script></head><body>\n  <!-- nav -->\n"
+        "<noscript>enable js</noscript><svg><path d=\"M0\"/></svg><iframe src=\"x\"></iframe>"
+        "<img src=\"data:image/png;base64,iVBORw0KGgo=\">\n\n   <p>Hi   there</p></body></html>"
+    )
+    assert shrink_html(html) == '<html><head></head><body> <img src="data:,"> <p>Hi there</p></body></html>'